@@ -8,41 +8,82 @@ light_runner_with_settings.py
 - Handles Ctrl+C / SIGTERM to stop audio and exit cleanly.
 
 Usage:
-  python light_runner_with_settings.py [--interval 2.0] [--message "heartbeat"] [--silent] [--count N] [--configure]
+  python light_runner_with_settings.py [--interval 2.0] [--message "heartbeat"] [--silent] [--count N] [--configure] [--idle]
 
 If --mp3 PATH is provided, it overrides config and is saved.
 """
 from __future__ import annotations
 import argparse
+import copy
+import ctypes
+import functools
+import importlib.util
 import json
+import os
 import platform
+import select
+import selectors
 import signal
-import shutil
+import stat
 import sys
 import time
-from threading import Event, Thread
-from datetime import datetime
+from threading import Event
 from pathlib import Path
 import subprocess
 
-# GUI
 try:
-    import tkinter as tk
-    from tkinter import filedialog, messagebox
-except Exception:
-    tk = None  # we'll check later
+    import orjson  # optional; see _dumps()
+except ImportError:
+    orjson = None
 
+# heartbeat timestamp format (time.strftime, no datetime object per tick)
+_TS_FMT = "%Y-%m-%d %H:%M:%S"
+
+# Set by SIGINT/SIGTERM; the timerfd loop also reads a wakeup self-pipe.
 stop_event = Event()
-heartbeat_event = Event()
 
 
 def sigterm_handler(signum, frame):
     stop_event.set()
-    heartbeat_event.set()
 
 
-def alarm_handler(signum, frame):
-    heartbeat_event.set()
+# ---------------------------
+# Linux timerfd (via ctypes)
+# ---------------------------
+_CLOCK_MONOTONIC = 1
+
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+
+class _Itimerspec(ctypes.Structure):
+    _fields_ = [("it_interval", _Timespec), ("it_value", _Timespec)]
+
+
+def timerfd_open(interval: float) -> int | None:
+    """
+    Return a periodic timerfd firing every `interval` seconds, or None if
+    timerfd_create is unavailable (non-Linux, no libc, old kernel).
+    """
+    if platform.system() != "Linux":
+        return None
+    try:
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        timerfd_create = libc.timerfd_create
+        timerfd_settime = libc.timerfd_settime
+    except (OSError, AttributeError):
+        return None
+    fd = timerfd_create(_CLOCK_MONOTONIC, os.O_CLOEXEC)
+    if fd < 0:
+        return None
+    sec = int(interval)
+    ts = _Timespec(sec, int((interval - sec) * 1_000_000_000))
+    spec = _Itimerspec(ts, ts)
+    if timerfd_settime(fd, 0, ctypes.byref(spec), None) != 0:
+        os.close(fd)
+        return None
+    return fd
 
 
 # ---------------------------
@@ -58,10 +99,10 @@ def get_config_path() -> Path:
     filename = "config.json"
     try:
         if platform.system() == "Windows":
-            appdata = Path(os_getenv("APPDATA") or Path.home() / "AppData" / "Roaming")
+            appdata = Path(os.environ.get("APPDATA") or Path.home() / "AppData" / "Roaming")
             cfg_dir = appdata / name
         else:
-            xdg = Path(os_getenv("XDG_CONFIG_HOME") or Path.home() / ".config")
+            xdg = Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config")
             cfg_dir = xdg / name
         cfg_dir.mkdir(parents=True, exist_ok=True)
         return cfg_dir / filename
@@ -70,22 +111,40 @@ def get_config_path() -> Path:
         return Path.home() / ".light_runner_config.json"  # Fallback
 
 
-def os_getenv(key: str):
-    import os
+# orjson pretty-prints ~10x faster and returns bytes directly
+if orjson is not None:
+
+    def _dumps(data: dict) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+else:
 
-    return os.environ.get(key)
+    def _dumps(data: dict) -> bytes:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+# Parsed config cache: path -> (st_mtime_ns, st_size, data)
+_CFG_CACHE: dict[Path, tuple[int, int, dict]] = {}
 
 
 def load_config(path: Path) -> dict:
-    if not path.is_file():
+    try:
+        st = path.stat()
+    except OSError:
         return {}
+    if not stat.S_ISREG(st.st_mode):
+        return {}
+    cached = _CFG_CACHE.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        # callers mutate the returned dict, so hand out a copy
+        return copy.deepcopy(cached[2])
     try:
-        with path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-            if not isinstance(data, dict):
-                print("[!] Config file corrupted, using empty config.")
-                return {}
-            return data
+        data = json.loads(path.read_bytes())
+        if not isinstance(data, dict):
+            print("[!] Config file corrupted, using empty config.")
+            return {}
+        _CFG_CACHE[path] = (st.st_mtime_ns, st.st_size, data)
+        return copy.deepcopy(data)
     except json.JSONDecodeError as e:
         print(f"[!] JSON decode error in config: {e}, using empty config.")
         return {}
@@ -95,61 +154,197 @@ def load_config(path: Path) -> dict:
 
 
 def save_config(path: Path, data: dict) -> None:
-    tmp = path.with_suffix(".tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    tmp.replace(path)
+    new_bytes = _dumps(data)
+    try:
+        unchanged = path.is_file() and path.read_bytes() == new_bytes
+    except OSError:
+        unchanged = False
+    if not unchanged:
+        # write, fsync file, rename, fsync dir: the rename is atomic and a
+        # crash cannot leave a truncated config behind
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("wb") as f:
+            f.write(new_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        if hasattr(os, "O_DIRECTORY"):  # POSIX only; Windows can't open dirs
+            dirfd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dirfd)
+            finally:
+                os.close(dirfd)
+    # keep the cache in sync with what is on disk
+    st = path.stat()
+    _CFG_CACHE[path] = (st.st_mtime_ns, st.st_size, copy.deepcopy(data))
 
 
 # ---------------------------
 # Audio player (same abstraction)
 # ---------------------------
+@functools.lru_cache(maxsize=1)
+def _path_executables() -> frozenset[str]:
+    """
+    Names of everything in the $PATH directories, scanned once per process
+    (replaces one shutil.which() walk per candidate player).
+    On Windows names are lowercased and PATHEXT suffixes stripped, so "mpv"
+    matches mpv.exe.
+    """
+    out = set()
+    windows = platform.system() == "Windows"
+    if windows:
+        exts = tuple(
+            e.lower()
+            for e in os.environ.get("PATHEXT", ".COM;.EXE;.BAT;.CMD").split(";")
+            if e
+        )
+    for d in os.environ.get("PATH", "").split(os.pathsep):
+        if not d:
+            continue
+        try:
+            names = os.listdir(d)
+        except OSError:
+            continue
+        if windows:
+            for name in names:
+                name = name.lower()
+                base, ext = os.path.splitext(name)
+                if ext in exts:
+                    out.add(base)
+                out.add(name)
+        else:
+            out.update(names)
+    return frozenset(out)
+
+
+def proc_pidfd(proc: subprocess.Popen) -> int | None:
+    """
+    Return a pidfd (readable once proc exits) or None if os.pidfd_open is
+    unavailable, the kernel is too old (< 5.3) or proc was already reaped.
+    """
+    pidfd_open = getattr(os, "pidfd_open", None)
+    if pidfd_open is None or proc.returncode is not None:
+        return None
+    try:
+        return pidfd_open(proc.pid)
+    except OSError:
+        return None
+
+
+def _wait_proc(proc: subprocess.Popen, timeout: float):
+    """
+    Wait for proc to exit. On Linux (pidfd_open, kernel >= 5.3) block in poll()
+    on a pidfd instead of Popen.wait()'s waitpid+sleep loop; otherwise fall back
+    to proc.wait(). Raises subprocess.TimeoutExpired like Popen.wait().
+    """
+    if proc.returncode is not None:
+        return proc.returncode
+    if hasattr(select, "poll"):
+        fd = proc_pidfd(proc)
+        if fd is not None:
+            try:
+                p = select.poll()
+                p.register(fd, select.POLLIN)
+                p.poll(timeout * 1000)
+            finally:
+                os.close(fd)
+            rc = proc.poll()
+            if rc is None:
+                raise subprocess.TimeoutExpired(proc.args, timeout)
+            return rc
+    return proc.wait(timeout=timeout)
+
+
 class AudioPlayer:
     def __init__(self, path: str, loop: bool = False):
-        from pathlib import Path
-
         self.path = str(path)
         self.loop = bool(loop)
         self.backend = None
         self.proc = None
-        self._thread = None
         self._use_pygame = False
         self.pygame = None
-        # try pygame
-        try:
-            import pygame
-
-            pygame.mixer.init()
-            self.pygame = pygame
+        # prefer CLI players; pygame (SDL mixer init) is heavier and is only
+        # imported/initialised on first play() via _ensure_pygame()
+        for cmd in ("mpg123", "mpv", "ffplay", "afplay"):
+            if cmd in _path_executables():
+                self.backend = cmd
+                break
+        # desktop opener: last resort, and the fallback if pygame init fails
+        if platform.system() == "Windows":
+            opener = "start"
+        elif "xdg-open" in _path_executables():
+            opener = "xdg-open"
+        elif "open" in _path_executables():
+            opener = "open"
+        else:
+            opener = None
+        self._opener = opener
+        if self.backend is None and importlib.util.find_spec("pygame") is not None:
             self._use_pygame = True
             self.backend = "pygame"
-        except Exception:
+        if self.backend is None:
+            self.backend = opener
+        # path, loop and backend are fixed from here on: build argv once
+        self._argv = self._build_argv()
+        self._exists = Path(self.path).is_file()
+
+    def _build_argv(self) -> list[str] | None:
+        if self.backend == "ffplay":
+            if self.loop:
+                return [
+                    self.backend,
+                    "-nodisp",
+                    "-loop",
+                    "0",
+                    "-loglevel",
+                    "quiet",
+                    self.path,
+                ]
+            return [
+                self.backend,
+                "-nodisp",
+                "-autoexit",
+                "-loglevel",
+                "quiet",
+                self.path,
+            ]
+        if self.backend == "mpv":
+            args = [self.backend, "--no-terminal", "--really-quiet"]
+            if self.loop:
+                args += ["--loop-file=inf"]
+            return args + [self.path]
+        if self.backend in ("mpg123", "afplay"):
+            if self.loop and self.backend == "mpg123":
+                # mpg123 has -z (shuffle) but no simple loop; leaving as best-effort
+                return [self.backend, "-z", "-q", self.path]
+            return [self.backend, self.path]
+        return None
+
+    def _ensure_pygame(self) -> bool:
+        try:
+            if self.pygame is None:
+                import pygame
+
+                self.pygame = pygame
+            if not self.pygame.mixer.get_init():
+                self.pygame.mixer.init()
+            return True
+        except Exception as e:
+            print(f"[!] pygame init failed: {e}")
+            self._use_pygame = False
             self.pygame = None
-        if not self._use_pygame:
-            for cmd in ("mpg123", "mpv", "ffplay", "afplay"):
-                if shutil.which(cmd):
-                    self.backend = cmd
-                    break
-            if self.backend is None:
-                if platform.system() == "Windows":
-                    self.backend = "start"
-                else:
-                    if shutil.which("xdg-open"):
-                        self.backend = "xdg-open"
-                    elif shutil.which("open"):
-                        self.backend = "open"
-                    else:
-                        self.backend = None
+            self.backend = self._opener  # play() falls through to it
+            return False
 
     def play(self):
-        from pathlib import Path
-
-        p = Path(self.path)
-        if not p.is_file():
+        # only re-stat while the file has not been seen yet
+        if not self._exists:
+            self._exists = Path(self.path).is_file()
+        if not self._exists:
             print(f"[!] Audio file not found: {self.path}")
             return False
 
-        if self._use_pygame and self.pygame:
+        if self._use_pygame and self._ensure_pygame():
             try:
                 self.pygame.mixer.music.load(self.path)
                 # loop: -1 means forever, 0 means play once
@@ -160,53 +355,23 @@ class AudioPlayer:
             except Exception as e:
                 print(f"[!] pygame playback failed: {e}")
 
-        if self.backend in ("mpg123", "mpv", "ffplay", "afplay"):
+        if self._argv is not None:
             try:
-                if self.backend == "ffplay":
-                    args = [
-                        self.backend,
-                        "-nodisp",
-                        "-autoexit",
-                        "-loglevel",
-                        "quiet",
-                        self.path,
-                    ]
-                    if self.loop:
-                        args = [
-                            self.backend,
-                            "-nodisp",
-                            "-loop",
-                            "0",
-                            "-loglevel",
-                            "quiet",
-                            self.path,
-                        ]
-                elif self.backend == "mpv":
-                    args = [self.backend, "--no-terminal", "--really-quiet"]
-                    if self.loop:
-                        args += ["--loop-file=inf"]
-                    args += [self.path]
-                else:  # mpg123, afplay
-                    args = [self.backend, self.path]
-                    if self.loop and self.backend == "mpg123":
-                        args = [
-                            self.backend,
-                            "-z",
-                            "-q",
-                            self.path,
-                        ]  # mpg123 has -z (shuffle) but no simple loop; leaving as best-effort
                 self.proc = subprocess.Popen(
-                    args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                    self._argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
                 )
                 print(f"[*] Playing via {self.backend} (pid={self.proc.pid})")
                 return True
             except Exception as e:
                 print(f"[!] {self.backend} playback failed: {e}")
 
-        if self.backend in ("xdg-open", "open", "start"):
+        if self.backend in ("xdg-open", "open", "start", "startfile"):
             try:
-                if self.backend == "start":
-                    self.proc = subprocess.Popen(f'start "" "{self.path}"', shell=True)
+                if self.backend in ("start", "startfile"):
+                    # ShellExecute directly; no cmd.exe and no shell quoting
+                    os.startfile(self.path)
+                    self.proc = None
+                    self.backend = "startfile"
                 else:
                     self.proc = subprocess.Popen(
                         [self.backend, self.path],
@@ -218,41 +383,20 @@ class AudioPlayer:
             except Exception as e:
                 print(f"[!] fallback open failed: {e}")
 
-        # playsound fallback
-        try:
-            from playsound import playsound
-
-            def _ps():
-                try:
-                    if self.loop:
-                        # playsound has no loop; naive loop implementation
-                        while not stop_event.is_set():
-                            playsound(self.path)
-                    else:
-                        playsound(self.path)
-                except Exception:
-                    pass
-
-            self._thread = Thread(target=_ps, daemon=True)
-            self._thread.start()
-            self.backend = "playsound-thread"
-            print("[*] Playing via playsound in background thread.")
-            return True
-        except Exception:
-            pass
-
         print("[!] No audio backend available.")
         return False
 
-    def stop(self):
+    def stop(self, quit_mixer: bool = True):
+        # quit_mixer=False keeps pygame's mixer initialised for a replay soon
         stopped = False
         if self._use_pygame and self.pygame:
             try:
                 self.pygame.mixer.music.stop()
-                try:
-                    self.pygame.mixer.quit()
-                except Exception:
-                    pass
+                if quit_mixer:
+                    try:
+                        self.pygame.mixer.quit()
+                    except Exception:
+                        pass
                 stopped = True
                 print("[*] Stopped pygame playback.")
             except Exception:
@@ -260,7 +404,7 @@ class AudioPlayer:
         if self.proc:
             try:
                 self.proc.terminate()
-                self.proc.wait(timeout=1)
+                _wait_proc(self.proc, 1)
                 stopped = True
                 print("[*] Terminated external player process.")
             except Exception:
@@ -269,9 +413,11 @@ class AudioPlayer:
                     stopped = True
                 except Exception:
                     pass
-        if not stopped and self._thread and self._thread.is_alive():
+            if stopped:
+                self.proc = None  # player may be reused; don't stop it twice
+        if not stopped and self.backend == "startfile":
             print(
-                "[*] Playback thread cannot be reliably stopped programmatically; it will finish naturally."
+                "[*] File was handed to the default app via os.startfile; it cannot be stopped programmatically."
             )
             stopped = True
         return stopped
@@ -284,7 +430,11 @@ def open_config_gui(initial_path: str | None = None) -> dict | None:
     """
     Open tkinter GUI to choose MP3. Returns config dict or None if cancelled.
     """
-    if tk is None:
+    # imported here so the CLI-only path never loads _tkinter / Tcl
+    try:
+        import tkinter as tk
+        from tkinter import filedialog, messagebox
+    except Exception:
         print("[!] tkinter not available; cannot open GUI.")
         return None
 
@@ -295,6 +445,10 @@ def open_config_gui(initial_path: str | None = None) -> dict | None:
 
     # Data holder
     selected = {"path": initial_path or "", "loop": False}
+    # one AudioPlayer per path, reused across "Test Play" clicks
+    player_cache: dict[str, AudioPlayer] = {}
+    # pending root.after() stop callback per path
+    stop_timers: dict[str, str] = {}
 
     def browse():
         p = filedialog.askopenfilename(
@@ -312,7 +466,16 @@ def open_config_gui(initial_path: str | None = None) -> dict | None:
         if not path:
             messagebox.showwarning("No file", "Please choose a file first.")
             return
-        ap = AudioPlayer(path, loop=False)
+        # cancel an earlier click's stop timer so it can't cut this play short
+        timer = stop_timers.pop(path, None)
+        if timer is not None:
+            root.after_cancel(timer)
+        ap = player_cache.get(path)
+        if ap is None:
+            ap = AudioPlayer(path, loop=False)
+            player_cache[path] = ap
+        elif ap.proc is not None:
+            ap.stop(quit_mixer=False)  # still running from a previous click
         ok = ap.play()
         if not ok:
             messagebox.showerror(
@@ -320,7 +483,7 @@ def open_config_gui(initial_path: str | None = None) -> dict | None:
             )
             return
         # stop after 3 seconds
-        root.after(3000, lambda: ap.stop())
+        stop_timers[path] = root.after(3000, lambda: ap.stop(quit_mixer=False))
 
     def do_save():
         p = entry_var.get().strip()
@@ -328,8 +491,6 @@ def open_config_gui(initial_path: str | None = None) -> dict | None:
             messagebox.showwarning("Missing", "Path cannot be empty.")
             return
         # basic validation: file exists
-        from pathlib import Path
-
         if not Path(p).is_file():
             if not messagebox.askyesno(
                 "File not found", "File does not exist. Save anyway?"
@@ -380,6 +541,11 @@ def open_config_gui(initial_path: str | None = None) -> dict | None:
 
     root.mainloop()
 
+    # window closed (Save, Cancel or WM close): silence any test playback and
+    # release the mixer that test plays kept initialised
+    for ap in player_cache.values():
+        ap.stop()
+
     if selected.get("path"):
         return {"mp3": selected["path"], "loop": bool(selected["loop"])}
     return None
@@ -388,9 +554,33 @@ def open_config_gui(initial_path: str | None = None) -> dict | None:
 # ---------------------------
 # Main program
 # ---------------------------
+def set_idle_priority() -> None:
+    """
+    Only get CPU time when nothing else wants it: SCHED_IDLE where available
+    (Linux), otherwise (or if refused) nice 19.
+    """
+    if getattr(os, "SCHED_IDLE", None) is not None:
+        try:
+            os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+            print("[*] Priority: SCHED_IDLE")
+            return
+        except OSError:
+            pass
+    if hasattr(os, "nice"):
+        try:
+            os.nice(19)
+            print("[*] Priority: nice 19")
+            return
+        except OSError:
+            pass
+    print("[!] Could not lower process priority.")
+
+
 def main():
     parser = argparse.ArgumentParser(
-        description="Light runner with settings GUI for MP3 target."
+        description="Light runner with settings GUI for MP3 target.",
+        epilog="Audio playback needs one of mpg123, mpv, ffplay, afplay or pygame "
+        "(or a desktop opener: xdg-open / open / Windows default app).",
     )
     parser.add_argument(
         "-i",
@@ -419,6 +609,11 @@ def main():
         action="store_true",
         help="Open GUI to configure MP3 target and exit (or continue).",
     )
+    parser.add_argument(
+        "--idle",
+        action="store_true",
+        help="Run the heartbeat loop at idle CPU priority (SCHED_IDLE on Linux, else nice 19).",
+    )
     args = parser.parse_args()
 
     # signal handlers
@@ -431,27 +626,22 @@ def main():
     cfg_path = get_config_path()
     cfg = load_config(cfg_path)
 
-    # If --mp3 passed, override and save
+    # set whenever cfg changes; saved once after all overrides are applied
+    dirty = False
+
+    # If --mp3 passed, override (saved below)
     if args.mp3:
         cfg["mp3"] = args.mp3
         # keep existing loop flag if present
         cfg.setdefault("loop", False)
-        try:
-            save_config(cfg_path, cfg)
-            print(f"[*] Saved MP3 to config: {cfg_path}")
-        except Exception as e:
-            print(f"[!] Failed to save config: {e}")
+        dirty = True
 
     # If no mp3 in config or user asked to configure -> open GUI
     if args.configure or not cfg.get("mp3"):
         gui_result = open_config_gui(initial_path=cfg.get("mp3"))
         if gui_result:
             cfg.update(gui_result)
-            try:
-                save_config(cfg_path, cfg)
-                print(f"[*] Config saved to {cfg_path}")
-            except Exception as e:
-                print(f"[!] Failed to save config: {e}")
+            dirty = True
         else:
             # GUI cancelled. If still no mp3 configured, exit.
             if not cfg.get("mp3"):
@@ -460,6 +650,13 @@ def main():
             else:
                 print("[*] Using existing configuration.")
 
+    if dirty:
+        try:
+            save_config(cfg_path, cfg)
+            print(f"[*] Config saved to {cfg_path}")
+        except Exception as e:
+            print(f"[!] Failed to save config: {e}")
+
     mp3_path = cfg.get("mp3")
     loop_flag = cfg.get("loop", False)
 
@@ -472,10 +669,30 @@ def main():
                 "[!] Audio playback failed (no available backend). Continuing without audio."
             )
 
+    # mpg123 has no loop flag, so a looping clip is restarted when it exits
+    restartable = player is not None and player.loop and player.backend == "mpg123"
+    # Restarts must not inherit --idle priority, and an unprivileged process
+    # can't leave SCHED_IDLE / nice 19 again. Both are per-thread on Linux, so
+    # restarts are spawned from a worker thread started before the drop.
+    respawner = None
+    if args.idle and restartable:
+        from concurrent.futures import ThreadPoolExecutor
+
+        respawner = ThreadPoolExecutor(max_workers=1)
+        respawner.submit(lambda: None).result()
+
+    # Lower priority only after the player started, so it keeps normal priority
+    if args.idle:
+        set_idle_priority()
+
     # Choose efficient waiting mode
+    timer_fd = timerfd_open(args.interval)
+    # every CPython POSIX build with setitimer also has pthread_sigmask/sigwait
     is_posix = (platform.system() != "Windows") and hasattr(signal, "setitimer")
-    if is_posix:
-        print("[*] Mode: POSIX timer + pause (ultra-hemat)")
+    if timer_fd is not None:
+        print("[*] Mode: Linux timerfd + select (ultra-hemat)")
+    elif is_posix:
+        print("[*] Mode: POSIX timer + sigwait (ultra-hemat)")
     else:
         print("[*] Mode: Fallback Event.wait (hemat)")
 
@@ -487,38 +704,161 @@ def main():
             print(f"[*] Will stop after {args.count} heartbeats.")
 
     heartbeat_count = 0
+    old_wakeup = None
+    wake_r = wake_w = None
+    # Bind everything the loops touch per tick to locals (LOAD_FAST instead
+    # of LOAD_GLOBAL / attribute lookups on every heartbeat).
+    _silent = args.silent
+    _interval = args.interval
+    _count = args.count
+    _msg = args.message
+    _stop = stop_event
+    _print = print
+    _strftime = time.strftime
+    _fmt = _TS_FMT
+    _monotonic = time.monotonic
+    _read = os.read
+    _sigwait = getattr(signal, "sigwait", None)
+    _SIGALRM = getattr(signal, "SIGALRM", None)
+    _SIGINT = signal.SIGINT
+    _SIGTERM = signal.SIGTERM
     try:
-        if is_posix:
-            signal.signal(signal.SIGALRM, alarm_handler)
-            signal.setitimer(signal.ITIMER_REAL, args.interval, args.interval)
-            while not stop_event.is_set():
-                signal.pause()
-                if stop_event.is_set():
-                    break
-                if heartbeat_event.is_set():
-                    heartbeat_event.clear()
+        if timer_fd is not None:
+            # Self-pipe installed with signal.set_wakeup_fd(): the C-level
+            # handler writes one byte (the signal number) per signal, which is
+            # async-signal-safe and costs one os.read() per wakeup.
+            wake_r, wake_w = os.pipe()
+            os.set_blocking(wake_r, False)
+            os.set_blocking(wake_w, False)
+            old_wakeup = signal.set_wakeup_fd(wake_w)
+        # SIGINT/SIGTERM may have arrived before the loop (GUI, player startup)
+        if not _stop.is_set():
+            if timer_fd is not None:
+                sel = selectors.DefaultSelector()
+                sel.register(timer_fd, selectors.EVENT_READ)
+                sel.register(wake_r, selectors.EVENT_READ)
+                # also wake when an external CLI player exits (desktop openers
+                # exit right after handing the file off, so they're not watched)
+                player_fd = None
+                if player and player.proc and player._argv is not None:
+                    player_fd = proc_pidfd(player.proc)
+                    if player_fd is not None:
+                        sel.register(player_fd, selectors.EVENT_READ)
+
+
+                def restart_player() -> int | None:
+                    if respawner is not None:
+                        ok = respawner.submit(player.play).result()
+                    else:
+                        ok = player.play()
+                    fd = proc_pidfd(player.proc) if ok else None
+                    if fd is not None:
+                        sel.register(fd, selectors.EVENT_READ)
+                    return fd
+
+                # at most one restart per heartbeat tick, so a clip mpg123
+                # finishes instantly can't turn into a fork storm
+                restart_ok = True
+                restart_pending = False
+                running = True
+                try:
+                    while running:
+                        for key, _ in sel.select():
+                            if key.fd == wake_r:
+                                try:
+                                    sigs = _read(wake_r, 64)
+                                except BlockingIOError:
+                                    continue
+                                if _SIGINT in sigs or _SIGTERM in sigs:
+                                    running = False
+                                    break
+                                continue
+                            if key.fd == player_fd:
+                                sel.unregister(player_fd)
+                                os.close(player_fd)
+                                player_fd = None
+                                rc = player.proc.poll()
+                                _print(f"[*] Audio player exited (code {rc}).")
+                                # restart a looping mpg123 clip that ended normally
+                                if restartable and rc == 0:
+                                    if restart_ok:
+                                        restart_ok = False
+                                        player_fd = restart_player()
+                                    else:
+                                        restart_pending = True
+                                continue
+                            # drain the 8-byte expiration counter
+                            _read(timer_fd, 8)
+                            restart_ok = True
+                            if restart_pending:
+                                restart_pending = restart_ok = False
+                                player_fd = restart_player()
+                            heartbeat_count += 1
+                            if not _silent:
+                                now = _strftime(_fmt)
+                                _print(f"[{now}] {_msg} ({heartbeat_count})")
+                            if _count > 0 and heartbeat_count >= _count:
+                                running = False
+                                break
+                finally:
+                    sel.close()
+                    if player_fd is not None:
+                        os.close(player_fd)
+            elif is_posix:
+                # Collect the signals synchronously: sigwait() returns the signal
+                # number and no Python handler runs for them at all.
+                # Native threads started earlier (SDL/CoreAudio/Pulse via pygame)
+                # don't have these blocked. A no-op handler keeps a tick sent to
+                # one of them from killing the process, and a SIGINT/SIGTERM sent
+                # there sets stop_event, which is checked after every sigwait().
+                signal.signal(signal.SIGALRM, lambda *a: None)
+                sigset = {signal.SIGALRM, signal.SIGINT, signal.SIGTERM}
+                old_mask = signal.pthread_sigmask(signal.SIG_BLOCK, sigset)
+                signal.setitimer(signal.ITIMER_REAL, args.interval, args.interval)
+                try:
+                    # re-check: a signal may have been handled just before blocking
+                    while not _stop.is_set():
+                        if _sigwait(sigset) != _SIGALRM or _stop.is_set():
+                            break
+                        heartbeat_count += 1
+                        if not _silent:
+                            now = _strftime(_fmt)
+                            _print(f"[{now}] {_msg} ({heartbeat_count})")
+                        if _count > 0 and heartbeat_count >= _count:
+                            break
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+                    # a still-pending tick lands in the no-op handler on unblock
+                    signal.pthread_sigmask(signal.SIG_SETMASK, old_mask)
+            else:
+                # schedule against a monotonic deadline so early wakeups don't drift
+                deadline = _monotonic()
+                while not _stop.is_set():
+                    deadline += _interval
+                    now = _monotonic()
+                    if deadline < now:
+                        # missed ticks (stall/suspend): resync, don't burst
+                        deadline = now
+                    if _stop.wait(deadline - now):
+                        break
                     heartbeat_count += 1
-                    if not args.silent:
-                        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        print(f"[{now}] {args.message} ({heartbeat_count})")
-                    if args.count > 0 and heartbeat_count >= args.count:
+                    if not _silent:
+                        now = _strftime(_fmt)
+                        _print(f"[{now}] {_msg} ({heartbeat_count})")
+                    if _count > 0 and heartbeat_count >= _count:
                         break
-            signal.setitimer(signal.ITIMER_REAL, 0)
-        else:
-            while not stop_event.is_set():
-                heartbeat_event.wait(args.interval)
-                heartbeat_event.clear()
-                if stop_event.is_set():
-                    break
-                heartbeat_count += 1
-                if not args.silent:
-                    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    print(f"[{now}] {args.message} ({heartbeat_count})")
-                if args.count > 0 and heartbeat_count >= args.count:
-                    break
     except Exception as e:
         print(f"[!] Error: {e}", file=sys.stderr)
     finally:
+        if old_wakeup is not None:
+            signal.set_wakeup_fd(old_wakeup)
+        if wake_r is not None:
+            os.close(wake_r)
+            os.close(wake_w)
+        if timer_fd is not None:
+            os.close(timer_fd)
+        if respawner is not None:
+            respawner.shutdown()
         print("[*] Terminating. Stopping audio if possible...")
         if player:
             player.stop()